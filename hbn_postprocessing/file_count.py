@@ -1,12 +1,17 @@
 """Tools to count relevant files in the source directory."""
 
+import fnmatch
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
+from itertools import chain
 from pathlib import Path
 
 import pandas as pd
 
-from hbn_postprocessing.utils import glob_dir
+from hbn_postprocessing.utils import write_csv
 
 
 @dataclass
@@ -17,13 +22,6 @@ class SearchSpec:
     img_type: str
     glob: str
 
-    def count_files(self, datatype_dir: os.PathLike[str] | str) -> dict[str, int | str]:
-        """Find all the files in the directory that match the glob."""
-        files = glob_dir(datatype_dir, self.glob)
-        if files:
-            return {self.img_type: "yes", f"{self.img_type}_files": len(files)}
-        return {self.img_type: "no", f"{self.img_type}_files": 0}
-
 
 DATATYPE_SPECS = {
     spec.datatype: spec
@@ -34,18 +32,29 @@ DATATYPE_SPECS = {
     ]
 }
 
+SPEC_REGEXES = {
+    spec.img_type: re.compile(fnmatch.translate(spec.glob), re.ASCII)
+    for spec in DATATYPE_SPECS.values()
+}
+
 
 def count_files(bids_dir: os.PathLike[str] | str, subj_id: str) -> dict[str, int | str]:
     """Count the T1w, bold, and fMRI_epi files for the subject."""
-    subj_dir = Path(bids_dir) / f"sub-{subj_id}"
-    content = glob_dir(subj_dir, "*", filter_=lambda path: path.is_dir())
+    subj_dir = os.path.join(os.fspath(bids_dir), f"sub-{subj_id}")  # noqa: PTH118
     sub_dict: dict[str, int | str] = {"participant_id": f"sub-{subj_id}"}
 
-    for datatype_dir in content:
-        datatype = datatype_dir.name
-        if datatype not in DATATYPE_SPECS:
-            continue
-        sub_dict.update(DATATYPE_SPECS[datatype].count_files(datatype_dir))
+    with os.scandir(subj_dir) as entries:
+        for entry in entries:
+            spec = DATATYPE_SPECS.get(entry.name)
+            if spec is None or not entry.is_dir(follow_symlinks=False):
+                continue
+            pattern = SPEC_REGEXES[spec.img_type]
+            with os.scandir(entry.path) as datatype_entries:
+                n_files = sum(
+                    1 for file_ in datatype_entries if pattern.match(file_.name)
+                )
+            sub_dict[spec.img_type] = "yes" if n_files else "no"
+            sub_dict[f"{spec.img_type}_files"] = n_files
 
     return sub_dict
 
@@ -53,35 +62,46 @@ def count_files(bids_dir: os.PathLike[str] | str, subj_id: str) -> dict[str, int
 def count_all_files(
     bids_dir: os.PathLike[str] | str,
     out_dir: os.PathLike[str] | str,
+    subjects: frozenset[str] | None = None,
+    subject_dirs: list[os.DirEntry[str]] | None = None,
 ) -> pd.DataFrame:
-    """Write CSVs with relevant image counts."""
-    bids_path = Path(bids_dir)
+    """Write CSVs with relevant image counts.
+
+    If ``subjects`` is given, only subject IDs in that set are counted.
+    ``subject_dirs`` takes a prescanned listing of the BIDS root (see
+    :func:`~hbn_postprocessing.utils.collect_fs_metadata`) to avoid
+    rescanning it here.
+    """
+    bids_path = os.fspath(bids_dir)
+    if subject_dirs is None:
+        with os.scandir(bids_path) as entries:
+            subject_dirs = [
+                entry
+                for entry in entries
+                if entry.name.startswith("sub-")
+                and entry.is_dir(follow_symlinks=False)
+            ]
+    subject_ids = [entry.name[4:] for entry in subject_dirs]
+    if subjects is not None:
+        subject_ids = [subj_id for subj_id in subject_ids if subj_id in subjects]
+    with ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 1) * 4),
+    ) as executor:
+        sub_dicts = list(executor.map(partial(count_files, bids_path), subject_ids))
+    columns = dict.fromkeys(chain.from_iterable(sub_dicts))
     file_count_df = (
         pd.DataFrame(
-            [
-                count_files(bids_path, sub_dir.name.split("-")[1])
-                for sub_dir in glob_dir(
-                    bids_path,
-                    "sub-*",
-                    filter_=lambda path: path.is_dir(),
-                )
-            ],
+            {key: [sub_dict.get(key) for sub_dict in sub_dicts] for key in columns},
+            copy=False,
         )
         .astype({"participant_id": pd.StringDtype()})
         .set_index("participant_id")
     )
     out_path = Path(out_dir)
-    file_count_df.to_csv(out_path / "BIDS-count_all.csv", sep=",")
-    exclude_df = file_count_df.loc[
-        lambda df: (df["t1_files"] == 0) | (df["fmap_files"] == 0),
-        :,
-    ]
-    exclude_df.to_csv(out_path / "BIDS-count_exclude.csv", sep=",")
-    file_count_df.loc[
-        lambda df: ~df.index.isin(exclude_df.index),
-        :,
-    ].to_csv(
-        out_path / "BIDS-count_include.csv",
-        sep=",",
-    )
+    exclude_mask = (
+        (file_count_df["t1_files"] == 0) | (file_count_df["fmap_files"] == 0)
+    ).to_numpy()
+    write_csv(file_count_df, out_path / "BIDS-count_all.csv")
+    write_csv(file_count_df.iloc[exclude_mask], out_path / "BIDS-count_exclude.csv")
+    write_csv(file_count_df.iloc[~exclude_mask], out_path / "BIDS-count_include.csv")
     return file_count_df
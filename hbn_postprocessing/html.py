@@ -3,35 +3,42 @@
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from hbn_postprocessing.utils import glob_dir
+from hbn_postprocessing.utils import glob_dir, write_csv
 
 
 def check_html(
     fmriprep_out_dir: os.PathLike[str] | str,
     participants_path: os.PathLike[str] | str,
     out_dir: os.PathLike[str] | str,
+    html_files: set[str] | None = None,
 ) -> pd.DataFrame:
-    """Write a set of summary CSVs checking if participants have an HTML file."""
-    html_files = {file_.stem for file_ in glob_dir(fmriprep_out_dir, "*.html*")}
+    """Write a set of summary CSVs checking if participants have an HTML file.
+
+    ``html_files`` takes prescanned report stems (see
+    :func:`~hbn_postprocessing.utils.collect_fs_metadata`) to avoid
+    rescanning the fmriprep root here.
+    """
+    if html_files is None:
+        html_files = {
+            os.path.splitext(file_.name)[0]  # noqa: PTH122
+            for file_ in glob_dir(fmriprep_out_dir, "*.html*")
+        }
     participants = (
-        pd.read_csv(participants_path)
+        pd.read_csv(participants_path, engine="pyarrow")
         .astype({"participant_id": pd.StringDtype()})
     )
+    mask = participants["participant_id"].isin(html_files).to_numpy()
     matches = participants.assign(
-        html=participants["participant_id"]
-        .isin(html_files)
-        .replace([True, False], ["yes", "no"]),
+        html=pd.Categorical.from_codes(
+            np.where(mask, 0, 1),
+            categories=["yes", "no"],
+        ),
     ).set_index("participant_id")
     out_path = Path(out_dir)
-    matches.to_csv(out_path / "html-check_all.csv", sep=",")
-    matches[matches["html"] == "no"].to_csv(
-        out_path / "html-check_no.csv",
-        sep=",",
-    )
-    matches[matches["html"] == "yes"].to_csv(
-        out_path / "html-check_yes.csv",
-        sep=",",
-    )
+    write_csv(matches, out_path / "html-check_all.csv")
+    write_csv(matches.iloc[~mask], out_path / "html-check_no.csv")
+    write_csv(matches.iloc[mask], out_path / "html-check_yes.csv")
     return matches
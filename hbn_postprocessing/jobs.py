@@ -3,64 +3,83 @@
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from hbn_postprocessing.utils import glob_dir
+from hbn_postprocessing.utils import glob_dir, write_csv
 
 STARTED_THRESHOLD_KB = 10
 COMPLETED_THRESHOLD_KB = 4000
+HEAD_BYTES = 65536
+LABEL_TOKEN = b"participant_label "
 
 
-def _process_job_file(file_: Path) -> dict[str, str | float]:
-    with file_.open() as file_content:
-        out_content = file_content.read()
-    subj_id = out_content.partition("participant_label ")[2][0:12]
+def _process_job_file(file_: os.DirEntry[str]) -> tuple[str, str, float]:
+    with open(file_.path, "rb") as file_content:  # noqa: PTH123
+        head = file_content.read(HEAD_BYTES)
+        idx = head.find(LABEL_TOKEN)
+        if idx < 0:
+            head += file_content.read()
+            idx = head.find(LABEL_TOKEN)
+    start = idx + len(LABEL_TOKEN)
+    subj_id = head[start : start + 12].decode("ascii") if idx >= 0 else ""
     size_kb = file_.stat().st_size / 1000
-    return {"name": file_.name, "p_id": subj_id, "size_kb": size_kb}
+    return file_.name, subj_id, size_kb
 
 
 def check_jobs(
     jobs_dir: os.PathLike[str] | str,
     out_dir: os.PathLike[str] | str,
+    out_files: list[os.DirEntry[str]] | None = None,
 ) -> pd.DataFrame:
-    """Parse a dir of ".out" files to check for incomplete jobs."""
-    out_files = glob_dir(jobs_dir, "*.out*")
-    file_info = [_process_job_file(file_) for file_ in out_files]
+    """Parse a dir of ".out" files to check for incomplete jobs.
+
+    ``out_files`` takes a prescanned listing of the jobs dir (see
+    :func:`~hbn_postprocessing.utils.collect_fs_metadata`) to avoid
+    rescanning it here.
+    """
+    if out_files is None:
+        out_files = glob_dir(jobs_dir, "*.out*")
+    if out_files:
+        names, subj_ids, sizes = zip(
+            *(_process_job_file(file_) for file_ in out_files),
+            strict=True,
+        )
+    else:
+        names, subj_ids, sizes = (), (), ()
     size_df = (
         pd.DataFrame(
             {
-                "file_name": [file_["name"] for file_ in file_info],
-                "participant_id": [f'sub-{file_["p_id"]}' for file_ in file_info],
-                "size_kb": [file_["size_kb"] for file_ in file_info],
+                "file_name": names,
+                "participant_id": [f"sub-{subj_id}" for subj_id in subj_ids],
+                "size_kb": np.fromiter(sizes, dtype=np.float32, count=len(out_files)),
             },
         )
         .astype({"participant_id": pd.StringDtype()})
         .loc[lambda df: df["participant_id"].str.startswith("sub-NDA"), :]
     )
     max_size = (
-        size_df.groupby("participant_id")
-        .max()
-        .assign(
-            status=lambda df: df.size_kb.map(
-                lambda size_kb: "not started"
-                if size_kb < STARTED_THRESHOLD_KB
-                else (
-                    "partial/error"
-                    if size_kb < COMPLETED_THRESHOLD_KB
-                    else "likely complete"
-                ),
-            ),
-        )
+        size_df.sort_values("size_kb", ascending=False)
+        .drop_duplicates("participant_id", keep="first")
+        .set_index("participant_id")
+        .sort_index()
     )
-
-    out_path = Path(out_dir)
-    max_size.to_csv(out_path / "out-size_all.csv")
-    max_size.loc[max_size.status != "likely_complete", :].to_csv(
-        out_path / "out-size_incomp.csv",
-        sep=",",
+    size_arr = max_size["size_kb"].to_numpy()
+    status_codes = np.select(
+        [size_arr < STARTED_THRESHOLD_KB, size_arr < COMPLETED_THRESHOLD_KB],
+        [0, 1],
+        default=2,
     )
-    max_size.loc[max_size.status == "likely complete", :].to_csv(
-        out_path / "out-size_comp.csv",
-        sep=",",
+    max_size = max_size.assign(
+        status=pd.Categorical.from_codes(
+            status_codes,
+            categories=["not started", "partial/error", "likely complete"],
+        ),
     )
+
+    out_path = Path(out_dir)
+    comp_mask = (max_size["status"] == "likely complete").to_numpy()
+    write_csv(max_size, out_path / "out-size_all.csv")
+    write_csv(max_size.iloc[~comp_mask], out_path / "out-size_incomp.csv")
+    write_csv(max_size.iloc[comp_mask], out_path / "out-size_comp.csv")
     return max_size
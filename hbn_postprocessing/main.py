@@ -3,12 +3,22 @@
 from __future__ import annotations
 
 from argparse import ArgumentParser
+from functools import cache
 from pathlib import Path
 
 from hbn_postprocessing.file_count import count_all_files
 from hbn_postprocessing.html import check_html
 from hbn_postprocessing.jobs import check_jobs
 from hbn_postprocessing.motion import exclude_by_motion
+from hbn_postprocessing.utils import collect_fs_metadata, write_csv
+
+
+@cache
+def read_subject_list(path: str) -> tuple[str, ...]:
+    """Read a file with one subject ID per line, stripped and cached."""
+    return tuple(
+        line.strip() for line in Path(path).read_text().splitlines() if line.strip()
+    )
 
 
 def gen_parser() -> ArgumentParser:
@@ -18,6 +28,10 @@ def gen_parser() -> ArgumentParser:
     parser.add_argument("fmriprep_dir", help="fmriprep output dir")
     parser.add_argument("jobs_dir", help="Directory with .out files")
     parser.add_argument("out_dir", help="Output directory")
+    parser.add_argument(
+        "--subject-list",
+        help="File with one subject ID per line to restrict the file count",
+    )
     return parser
 
 
@@ -25,14 +39,28 @@ def main() -> None:
     """Run all relevant tasks."""
     args = gen_parser().parse_args()
 
-    file_count_df = count_all_files(args.bids_dir, args.out_dir)
+    subjects = (
+        frozenset(read_subject_list(args.subject_list)) if args.subject_list else None
+    )
+    metadata = collect_fs_metadata(args.bids_dir, args.fmriprep_dir, args.jobs_dir)
+    file_count_df = count_all_files(
+        args.bids_dir,
+        args.out_dir,
+        subjects=subjects,
+        subject_dirs=metadata.subject_dirs,
+    )
     html_check_df = check_html(
         args.fmriprep_dir,
         Path(args.bids_dir) / "participants.tsv",
         args.out_dir,
+        html_files=metadata.html_stems,
+    )
+    out_size_df = check_jobs(args.jobs_dir, args.out_dir, out_files=metadata.out_files)
+    motion_outliers_df = exclude_by_motion(
+        args.fmriprep_dir,
+        args.out_dir,
+        subj_dirs=metadata.fmriprep_subject_dirs,
     )
-    out_size_df = check_jobs(args.jobs_dir, args.out_dir)
-    motion_outliers_df = exclude_by_motion(args.fmriprep_dir, args.out_dir)
     overall_df = file_count_df.join(
         [html_check_df, out_size_df, motion_outliers_df],
         how="outer",
@@ -45,12 +73,10 @@ def main() -> None:
         & (overall_df["status"] == "likely complete")
         & (~overall_df["movieTP_is_outlier"].astype(bool))
     )
-    overall_df[complete].to_csv(Path(args.out_dir) / "overall_complete.csv", sep=",")
-    overall_df[~complete].to_csv(Path(args.out_dir) / "overall_incomplete.csv", sep=",")
-    overall_df.to_csv(
-        Path(args.out_dir) / "overall_summary.csv",
-        sep=",",
-    )
+    out_path = Path(args.out_dir)
+    write_csv(overall_df[complete], out_path / "overall_complete.csv")
+    write_csv(overall_df[~complete], out_path / "overall_incomplete.csv")
+    write_csv(overall_df, out_path / "overall_summary.csv")
 
 
 if __name__ == "__main__":
@@ -4,9 +4,13 @@ from __future__ import annotations
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 
 from hbn_postprocessing.utils import glob_dir
 
@@ -14,6 +18,7 @@ CONFOUNDS_PATTERN = re.compile(
     r"sub-(?P<subject>[a-zA-Z\d]+)_task-(?P<task>[a-zA-Z\d]+)"
     r"(?:_run-(?P<run>\d+))?_desc-(?P<description>[a-zA-Z\d]+)"
     r"_(?P<suffix>[a-zA-Z\d]+).tsv",
+    re.ASCII,
 )
 
 
@@ -21,9 +26,11 @@ def get_framewise_displacement(
     subj_dir: os.PathLike[str] | str,
 ) -> dict[str, str | float]:
     """Get the framewise displacement in each task for a subject."""
-    subj_path = Path(subj_dir)
-    tsvs = glob_dir(subj_path / "func", "*.tsv*")
-    sub_dict: dict[str, str | float] = {"participant_id": subj_path.name}
+    subj_path = os.fspath(subj_dir)
+    tsvs = glob_dir(os.path.join(subj_path, "func"), "*.tsv*")  # noqa: PTH118
+    sub_dict: dict[str, str | float] = {
+        "participant_id": os.path.basename(subj_path),  # noqa: PTH119
+    }
     for tsv in tsvs:
         match = re.match(CONFOUNDS_PATTERN, tsv.name)
         if not match:
@@ -31,35 +38,69 @@ def get_framewise_displacement(
         task = match.group("task")
         run = f"_run-{match.group('run')}" if match.group("run") else ""
         task_run = f"{task}{run}"
-        data = pd.read_csv(tsv, sep="\t", header=0)
-        sub_dict[task_run] = data["framewise_displacement"].tail(-1).mean()
+        table = pa_csv.read_csv(
+            tsv.path,
+            parse_options=pa_csv.ParseOptions(delimiter="\t"),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=["framewise_displacement"],
+                column_types={"framewise_displacement": pa.float32()},
+            ),
+        )
+        displacement = table.column("framewise_displacement").to_numpy()
+        sub_dict[task_run] = float(np.nanmean(displacement[1:]))
     return sub_dict
 
 
 def exclude_by_motion(
     bids_dir: os.PathLike[str] | str,
     out_dir: os.PathLike[str] | str,
+    subj_dirs: list[os.DirEntry[str]] | None = None,
 ) -> pd.DataFrame:
-    """Find outliers by framewise displacement per task."""
-    subj_dirs = glob_dir(bids_dir, "sub*", filter_=lambda path: path.is_dir())
-    displacement_df = (
-        pd.DataFrame(
-            [get_framewise_displacement(subj_dir) for subj_dir in subj_dirs],
-        )
-        .astype({"participant_id": pd.StringDtype()})
-        .set_index("participant_id")
+    """Find outliers by framewise displacement per task.
+
+    ``subj_dirs`` takes a prescanned listing of the root (see
+    :func:`~hbn_postprocessing.utils.collect_fs_metadata`) to avoid
+    rescanning it here.
+    """
+    if subj_dirs is None:
+        with os.scandir(bids_dir) as entries:
+            subj_dirs = [
+                entry
+                for entry in entries
+                if entry.name.startswith("sub") and entry.is_dir(follow_symlinks=False)
+            ]
+    with ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 1) * 4),
+    ) as executor:
+        sub_dicts = list(executor.map(get_framewise_displacement, subj_dirs))
+    task_runs = list(
+        dict.fromkeys(
+            key
+            for sub_dict in sub_dicts
+            for key in sub_dict
+            if key != "participant_id"
+        ),
+    )
+    col_idx = {task_run: idx for idx, task_run in enumerate(task_runs)}
+    fd_arr = np.full((len(sub_dicts), len(task_runs)), np.nan, dtype=np.float32)
+    for row, sub_dict in enumerate(sub_dicts):
+        for key, value in sub_dict.items():
+            if key != "participant_id":
+                fd_arr[row, col_idx[key]] = value
+    displacement_df = pd.DataFrame(
+        fd_arr,
+        index=pd.Index(
+            [sub_dict["participant_id"] for sub_dict in sub_dicts],
+            name="participant_id",
+            dtype=pd.StringDtype(),
+        ),
+        columns=task_runs,
+        copy=False,
     )
     group_fds = displacement_df.mean(axis=0)
-    group_sds = displacement_df.mean(axis=0)
+    group_sds = displacement_df.std(axis=0)
     upper_lims = group_fds + (2 * group_sds)
-    for task_run in displacement_df.columns:
-        displacement_df = displacement_df.assign(
-            **{
-                f"{task_run}_is_outlier": displacement_df[task_run]
-                > upper_lims[task_run],
-            },
-        )
-        displacement_df = displacement_df.drop(task_run, axis=1)
+    displacement_df = displacement_df.gt(upper_lims, axis=1).add_suffix("_is_outlier")
     displacement_df.to_csv(
         Path(out_dir) / "motion-outliers_all.csv",
         sep=",",
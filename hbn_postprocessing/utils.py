@@ -2,19 +2,46 @@
 
 from __future__ import annotations
 
-import glob
+import fnmatch
 import os
-from collections.abc import Callable
-from itertools import chain
-from pathlib import Path
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+
+def write_csv(df: pd.DataFrame, path: os.PathLike[str] | str) -> None:
+    """Write a DataFrame, index included, via pyarrow's CSV writer.
+
+    The arrow writer is multithreaded and skips pandas' per-row
+    formatting path; the index is materialised first so it stays the
+    leading column as with ``DataFrame.to_csv``.
+    """
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    pa_csv.write_csv(table, os.fspath(path))
+
+
+@cache
+def _translate(keyword: str) -> re.Pattern[str]:
+    """Compile a glob keyword to a regex, cached across calls."""
+    return re.compile(fnmatch.translate(keyword), re.ASCII)
 
 
 def glob_dir(
     path_spec: os.PathLike[str] | str,
     *keywords: str,
-    filter_: Callable[[Path], bool] | None = None,
-) -> list[Path]:
-    """List all the files matching the keyword glob.
+    only_dirs: bool = False,
+) -> list[os.DirEntry[str]]:
+    """List all the entries matching the keyword glob.
+
+    Returns ``os.DirEntry`` objects rather than ``Path`` so callers can
+    reuse the cached ``name``, ``path``, and ``stat`` without rebuilding
+    ``Path`` objects in hot loops; entries are path-like where a path is
+    needed.
 
     Parameters
     ----------
@@ -22,14 +49,80 @@ def glob_dir(
         Directory to glob
     keywords
         The type of file (e.g. "*T1w.nii.gz")
-    filter_
-        Function that decides if a path should be accepted
+    only_dirs
+        Whether to accept only directories (checked via the cached
+        ``DirEntry`` type to avoid an extra ``stat`` per entry)
+    """
+    patterns = [_translate(keyword) for keyword in keywords]
+    try:
+        entries = os.scandir(path_spec)
+    except (FileNotFoundError, NotADirectoryError):
+        # Match glob.glob, which returned [] for a missing directory
+        # (e.g. subjects without a func/ subdirectory).
+        return []
+    with entries:
+        return [
+            entry
+            for entry in entries
+            if any(pattern.match(entry.name) for pattern in patterns)
+            and (not only_dirs or entry.is_dir(follow_symlinks=False))
+        ]
+
+
+@dataclass
+class FsMetadata:
+    """Directory listings for the scan roots, collected up front."""
+
+    subject_dirs: list[os.DirEntry[str]]
+    html_stems: set[str]
+    fmriprep_subject_dirs: list[os.DirEntry[str]]
+    out_files: list[os.DirEntry[str]]
+
+
+def collect_fs_metadata(
+    bids_dir: os.PathLike[str] | str,
+    fmriprep_dir: os.PathLike[str] | str,
+    jobs_dir: os.PathLike[str] | str,
+) -> FsMetadata:
+    """Scan the three roots once each, on concurrent threads.
+
+    Each root is opened exactly once and its listing shared by every
+    downstream check, so per-call latency (a round trip each on
+    networked filesystems) overlaps instead of accumulating. The
+    fmriprep root yields both the HTML report stems and the subject
+    directories in a single pass.
     """
-    path = Path(path_spec)
-    return [
-        Path(dir_)
-        for dir_ in chain.from_iterable(
-            [glob.glob(str(path / keyword)) for keyword in keywords],
-        )
-        if (filter_(Path(dir_)) if filter_ else True)
-    ]
+
+    def scan_bids() -> list[os.DirEntry[str]]:
+        with os.scandir(bids_dir) as entries:
+            return [
+                entry
+                for entry in entries
+                if entry.name.startswith("sub-")
+                and entry.is_dir(follow_symlinks=False)
+            ]
+
+    def scan_fmriprep() -> tuple[set[str], list[os.DirEntry[str]]]:
+        html_stems: set[str] = set()
+        subject_dirs: list[os.DirEntry[str]] = []
+        with os.scandir(fmriprep_dir) as entries:
+            for entry in entries:
+                if ".html" in entry.name:
+                    html_stems.add(os.path.splitext(entry.name)[0])  # noqa: PTH122
+                elif entry.name.startswith("sub") and entry.is_dir(
+                    follow_symlinks=False,
+                ):
+                    subject_dirs.append(entry)
+        return html_stems, subject_dirs
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        bids_future = executor.submit(scan_bids)
+        fmriprep_future = executor.submit(scan_fmriprep)
+        jobs_future = executor.submit(glob_dir, jobs_dir, "*.out*")
+    html_stems, fmriprep_subject_dirs = fmriprep_future.result()
+    return FsMetadata(
+        subject_dirs=bids_future.result(),
+        html_stems=html_stems,
+        fmriprep_subject_dirs=fmriprep_subject_dirs,
+        out_files=jobs_future.result(),
+    )